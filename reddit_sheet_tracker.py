@@ -14,6 +14,9 @@ from __future__ import annotations
 import os
 import sys
 import json
+import sqlite3
+import functools
+from dataclasses import dataclass
 from datetime import datetime, timezone, date
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -38,11 +41,18 @@ def utc_now() -> datetime:
 
 def to_iso_z(dt: datetime) -> str:
     # Example: 2026-01-15T06:45:00Z
-    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    # isoformat() avoids strftime's format parsing
+    return dt.astimezone(timezone.utc).replace(microsecond=0, tzinfo=None).isoformat() + "Z"
 
 def parse_iso_z(s: str) -> datetime:
-    # expects "YYYY-MM-DDTHH:MM:SSZ"
-    return datetime.strptime(s, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+    # expects "YYYY-MM-DDTHH:MM:SSZ"; fixed-width slicing is much cheaper than strptime
+    return datetime(
+        int(s[0:4]), int(s[5:7]), int(s[8:10]),
+        int(s[11:13]), int(s[14:16]), int(s[17:19]),
+        tzinfo=timezone.utc,
+    )
+
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
 
 def env_bool(name: str, default: bool = False) -> bool:
     v = os.getenv(name)
@@ -76,17 +86,38 @@ def shorten(text: str, max_chars: int) -> str:
 # Config
 # ---------------------------
 
-SUBREDDIT = require_env("SUBREDDIT")
-
-REDDIT_CLIENT_ID = require_env("REDDIT_CLIENT_ID")
-REDDIT_CLIENT_SECRET = require_env("REDDIT_CLIENT_SECRET")
-REDDIT_USER_AGENT = require_env("REDDIT_USER_AGENT")
-
-SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")  # recommended
-SPREADSHEET_NAME = os.getenv("SPREADSHEET_NAME")  # fallback
-WORKSHEET_NAME = os.getenv("WORKSHEET_NAME", "Sheet1")
+@dataclass(frozen=True)
+class Config:
+    subreddit: str
+    reddit_client_id: str
+    reddit_client_secret: str
+    reddit_user_agent: str
+    spreadsheet_id: Optional[str]  # recommended
+    spreadsheet_name: Optional[str]  # fallback
+    worksheet_name: str
+
+@functools.lru_cache(maxsize=1)
+def config() -> Config:
+    """
+    Required settings, read on first use so importing the module (or printing usage)
+    doesn't need a full environment. Call config.cache_clear() after changing env vars.
+    """
+    spreadsheet_id = os.getenv("SPREADSHEET_ID")
+    return Config(
+        subreddit=require_env("SUBREDDIT"),
+        reddit_client_id=require_env("REDDIT_CLIENT_ID"),
+        reddit_client_secret=require_env("REDDIT_CLIENT_SECRET"),
+        reddit_user_agent=require_env("REDDIT_USER_AGENT"),
+        spreadsheet_id=spreadsheet_id,
+        spreadsheet_name=None if spreadsheet_id else os.getenv("SPREADSHEET_NAME"),
+        worksheet_name=os.getenv("WORKSHEET_NAME", "Sheet1"),
+    )
 
 POST_FETCH_LIMIT = env_int("POST_FETCH_LIMIT", 50)
+# Stop reading sr.new() after this many consecutive already-logged posts (0 = off).
+# Only worth it when POST_FETCH_LIMIT > 100 (PRAW pages 100 at a time), and it can miss
+# posts approved late from the spam filter/modqueue, which sort behind known posts.
+POLL_STOP_AFTER_KNOWN = env_int("POLL_STOP_AFTER_KNOWN", 0)
 
 STORE_BODY = env_bool("STORE_BODY", default=False)
 BODY_MAX_CHARS = env_int("BODY_MAX_CHARS", 800)
@@ -94,12 +125,165 @@ BODY_MAX_CHARS = env_int("BODY_MAX_CHARS", 800)
 # How many days of daily snapshots
 TRACK_DAYS = env_int("TRACK_DAYS", 7)
 
+# Reddit's /api/info accepts at most 100 fullnames per request
+INFO_BATCH_SIZE = 100
+
+# Sheet reads skip Sheets' display formatting; every cell we read is written RAW anyway.
+# Unformatted numbers come back as int/float, so reads convert cells back to str.
+SHEET_READ_OPTIONS = {
+    "value_render_option": "UNFORMATTED_VALUE",
+    "date_time_render_option": "SERIAL_NUMBER",
+}
+
+# Local cache of which post_ids are already in the sheet (avoids re-reading column A).
+# Defaults to next to this script so cron's working directory doesn't matter.
+STATE_DB_PATH = os.getenv(
+    "STATE_DB_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "state.sqlite"),
+)
+
+
+# ---------------------------
+# Sheet schema
+# ---------------------------
+
+# Columns:
+# A Post ID
+# B Subreddit
+# C Title
+# D Author
+# E Permalink
+# F Created UTC
+# G Inserted UTC (when we first logged it)
+# H Is Self Post
+# I Body (optional)
+# J Initial Score
+# K Initial Comments
+# L.. (Day1 Score, Day1 Comments, ... Day7 Score, Day7 Comments)
+# then Last Checked UTC, Status, and
+# Inserted epoch (same instant as G, integer seconds; cheap to do date math on).
+# inserted_epoch is last so sheets created before it existed keep their column layout.
+HEADER = [
+    "post_id",
+    "subreddit",
+    "title",
+    "author",
+    "permalink",
+    "created_utc",
+    "inserted_utc",
+    "is_self",
+    "body",
+    "initial_score",
+    "initial_comments",
+]
+
+for d in range(1, TRACK_DAYS + 1):
+    HEADER += [f"day{d}_score", f"day{d}_comments"]
+
+HEADER += ["last_checked_utc", "status"]  # status: active/done/removed/deleted/error
+HEADER += ["inserted_epoch"]
+
+def day_slot_cols(header: List[str]) -> List[Optional[Tuple[int, int]]]:
+    # (score_col, comments_col), 1-based, for day1..dayN; None if the sheet lacks that day
+    col_index = {name: i + 1 for i, name in enumerate(header)}
+    slots: List[Optional[Tuple[int, int]]] = []
+    for d in range(1, TRACK_DAYS + 1):
+        score_col = col_index.get(f"day{d}_score")
+        comm_col = col_index.get(f"day{d}_comments")
+        slots.append((score_col, comm_col) if score_col and comm_col else None)
+    return slots
+
+DAY_SLOT_COLS = day_slot_cols(HEADER)
+
+
+# ---------------------------
+# Local state
+# ---------------------------
+
+class LocalState:
+    """
+    Small SQLite cache mirroring the sheet's post_id column.
+    The sheet stays the source of truth: cached posts belong to one worksheet (see bind_sheet),
+    and an empty cache is backfilled from the sheet.
+    """
+
+    def __init__(self, path: str = STATE_DB_PATH):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS posts ("
+            "post_id TEXT PRIMARY KEY, inserted_utc TEXT, status TEXT, row_idx INTEGER)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        r = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return r[0] if r else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self.conn.commit()
+
+    def bind_sheet(self, ws: gspread.Worksheet) -> None:
+        # Drop cached posts if they were recorded for a different spreadsheet/worksheet
+        sheet_key = f"{ws.spreadsheet.id}:{ws.id}"
+        if self.get_meta("posts_sheet") == sheet_key:
+            return
+        self.clear_posts()
+        self.set_meta("posts_sheet", sheet_key)
+
+    def clear_posts(self) -> None:
+        self.conn.execute("DELETE FROM posts")
+        self.conn.commit()
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM posts LIMIT 1").fetchone() is None
+
+    def post_ids(self) -> set:
+        return {r[0] for r in self.conn.execute("SELECT post_id FROM posts")}
+
+    def add_posts(self, posts: List[Tuple[str, str, str, Optional[int]]]) -> None:
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO posts (post_id, inserted_utc, status, row_idx) VALUES (?, ?, ?, ?)",
+            posts,
+        )
+        self.conn.commit()
+
+    def backfill(self, ws: gspread.Worksheet) -> None:
+        # One-shot import of existing sheet rows (first run / deleted DB / new sheet).
+        # Only post_id, inserted_utc and status are downloaded.
+        header = read_row(ws, 1)
+        if not header:
+            return
+        col_index = {name: i + 1 for i, name in enumerate(header)}
+        id_col = col_index.get("post_id", 1)
+        inserted_col = col_index.get("inserted_utc")
+        status_col = col_index.get("status")
+        wanted = {c for c in (id_col, inserted_col, status_col) if c}
+
+        posts = []
+        for offset, row in enumerate(read_columns(ws, wanted, len(header))):
+            post_id = row[id_col - 1]
+            if not post_id:
+                continue
+            inserted = row[inserted_col - 1] if inserted_col else ""
+            status = row[status_col - 1] if status_col else ""
+            posts.append((post_id, inserted, status, offset + 2))
+        self.add_posts(posts)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
 # ---------------------------
 # Google Sheets
 # ---------------------------
 
+@functools.lru_cache(maxsize=1)
 def make_gspread_client() -> gspread.Client:
     """
+    Cached: credentials are parsed and authorized once per process.
+
     Supports either:
     - GOOGLE_SERVICE_ACCOUNT_FILE=/path/to/credentials.json (recommended for local dev), OR
     - GOOGLE_SERVICE_ACCOUNT_JSON='{"type":"service_account",...}' (stringified JSON)
@@ -121,83 +305,124 @@ def make_gspread_client() -> gspread.Client:
 
     return gspread.authorize(creds)
 
+@functools.lru_cache(maxsize=1)
 def open_worksheet(gc: gspread.Client) -> gspread.Worksheet:
-    if SPREADSHEET_ID:
-        sh = gc.open_by_key(SPREADSHEET_ID)
-    elif SPREADSHEET_NAME:
-        sh = gc.open(SPREADSHEET_NAME)
+    # Cached per client; avoids repeating the spreadsheet metadata round-trip.
+    cfg = config()
+    if cfg.spreadsheet_id:
+        sh = gc.open_by_key(cfg.spreadsheet_id)
+    elif cfg.spreadsheet_name:
+        sh = gc.open(cfg.spreadsheet_name)
     else:
         raise RuntimeError("Set SPREADSHEET_ID (preferred) or SPREADSHEET_NAME.")
 
-    return sh.worksheet(WORKSHEET_NAME)
+    return sh.worksheet(cfg.worksheet_name)
 
-def ensure_header(ws: gspread.Worksheet) -> None:
-    # If sheet is empty, add header row.
-    values = ws.get_all_values()
-    if values:
+def grow_grid(ws: gspread.Worksheet, rows: int, cols: int) -> None:
+    # Expand the grid up front (used for the header width on a fresh sheet).
+    # Never shrinks, so existing data is never cut off.
+    if ws.row_count >= rows and ws.col_count >= cols:
         return
+    ws.resize(rows=max(ws.row_count, rows), cols=max(ws.col_count, cols))
 
-    # Columns:
-    # A Post ID
-    # B Subreddit
-    # C Title
-    # D Author
-    # E Permalink
-    # F Created UTC
-    # G Inserted UTC (when we first logged it)
-    # H Is Self Post
-    # I Body (optional)
-    # J Initial Score
-    # K Initial Comments
-    # L.. (Day1 Score, Day1 Comments, ... Day7 Score, Day7 Comments)
-    header = [
-        "post_id",
-        "subreddit",
-        "title",
-        "author",
-        "permalink",
-        "created_utc",
-        "inserted_utc",
-        "is_self",
-        "body",
-        "initial_score",
-        "initial_comments",
-    ]
+def write_header(ws: gspread.Worksheet, state: Optional[LocalState] = None) -> None:
+    grow_grid(ws, rows=1, cols=len(HEADER))
+    ws.append_row(HEADER)
+    if state is not None:
+        # Fresh (or cleared) sheet: nothing cached for it is valid any more
+        state.clear_posts()
 
-    for d in range(1, TRACK_DAYS + 1):
-        header += [f"day{d}_score", f"day{d}_comments"]
-
-    header += ["last_checked_utc", "status"]  # status: active/done/removed/deleted/error
-    ws.append_row(header)
+def ensure_header(ws: gspread.Worksheet, state: Optional[LocalState] = None) -> None:
+    # If sheet is empty, add header row.
+    # Only probe A1:A2 rather than downloading the whole sheet.
+    values = ws.get("A1:A2", **SHEET_READ_OPTIONS)
+    if not values or not values[0]:
+        write_header(ws, state)
+    elif len(values) < 2 and state is not None:
+        # Header only (rows cleared by hand): cached post ids no longer match the sheet
+        state.clear_posts()
 
 
 # ---------------------------
 # Reddit
 # ---------------------------
 
+@functools.lru_cache(maxsize=1)
 def make_reddit() -> praw.Reddit:
+    # Cached: one session/auth/rate-limit state per process.
     return praw.Reddit(
-        client_id=REDDIT_CLIENT_ID,
-        client_secret=REDDIT_CLIENT_SECRET,
-        user_agent=REDDIT_USER_AGENT,
+        client_id=config().reddit_client_id,
+        client_secret=config().reddit_client_secret,
+        user_agent=config().reddit_user_agent,
     )
 
+@functools.lru_cache(maxsize=1)
+def get_subreddit(reddit: praw.Reddit, name: str):
+    return reddit.subreddit(name)
+
 def submission_permalink(sub) -> str:
     # Always store full URL
     return "https://www.reddit.com" + sub.permalink
 
+def log_rate_limits(reddit: praw.Reddit, label: str) -> None:
+    # remaining/used are None until PRAW has made a request.
+    # (reset time isn't logged: its key differs across PRAW versions.)
+    limits = reddit.auth.limits
+    if limits.get("remaining") is None:
+        return
+    print(f"[reddit] {label}: {limits['remaining']:.0f} request(s) left, used {limits.get('used')}")
+
+def fetch_submission_stats(reddit: praw.Reddit, post_ids: List[str]) -> Dict[str, Any]:
+    """
+    Returns {post_id: (score, num_comments)} as strings, or {post_id: Exception} on failure.
+    Uses reddit.info() so each API call covers up to INFO_BATCH_SIZE posts.
+    If Reddit's rate-limit budget runs out between batches, stops early rather than
+    blocking in PRAW's sleep; posts not fetched are left out of the result.
+    """
+    results: Dict[str, Any] = {}
+    for i in range(0, len(post_ids), INFO_BATCH_SIZE):
+        # Limits are only known once PRAW has made a request, i.e. from the second batch on
+        remaining = reddit.auth.limits.get("remaining")
+        if remaining is not None and remaining < 1:
+            print(f"[reddit] Rate limit exhausted; deferring {len(post_ids) - i} post(s) to the next run.")
+            break
+
+        chunk = post_ids[i:i + INFO_BATCH_SIZE]
+        try:
+            subs = reddit.info(fullnames=[f"t3_{pid}" for pid in chunk])
+            found = {s.id: (str(s.score), str(s.num_comments)) for s in subs}
+        except Exception as e:
+            for pid in chunk:
+                results[pid] = e
+            continue
+        for pid in chunk:
+            # /api/info silently omits ids it can't resolve
+            results[pid] = found.get(pid) or LookupError(f"post {pid} not returned by Reddit")
+    return results
+
 
 # ---------------------------
 # Sheet logic
 # ---------------------------
 
-def get_existing_post_ids(ws: gspread.Worksheet) -> set:
-    # Reads whole first column; OK for moderate sheets.
-    # If you expect huge sheets, switch to local state tracking.
-    col = ws.col_values(1)  # includes header
-    return set([x for x in col[1:] if x])
+def get_existing_post_ids(ws: gspread.Worksheet, state: LocalState) -> set:
+    # Served from the local state DB; only hits the sheet to backfill an empty DB
+    # (first run, deleted DB, or a different sheet than last time).
+    state.bind_sheet(ws)
+    if state.is_empty():
+        state.backfill(ws)
+    return state.post_ids()
+
+def appended_row_index(resp: Dict[str, Any]) -> Optional[int]:
+    # Parse the 1-based row index out of an append response ("Sheet1!A5:Z5" -> 5)
+    try:
+        rng = resp["updates"]["updatedRange"].split("!")[-1].split(":")[0]
+        row, _ = gspread.utils.a1_to_rowcol(rng)
+        return row
+    except (KeyError, IndexError, gspread.exceptions.IncorrectCellLabel):
+        return None
 
-def append_post_row(ws: gspread.Worksheet, sub) -> None:
+def build_post_row(sub) -> List[str]:
     inserted = utc_now()
     created = datetime.fromtimestamp(sub.created_utc, tz=timezone.utc)
 
@@ -208,7 +433,7 @@ def append_post_row(ws: gspread.Worksheet, sub) -> None:
 
     row = [
         sub.id,
-        SUBREDDIT,
+        config().subreddit,
         sub.title,
         author,
         submission_permalink(sub),
@@ -224,36 +449,74 @@ def append_post_row(ws: gspread.Worksheet, sub) -> None:
     for _ in range(TRACK_DAYS):
         row += ["", ""]
 
-    row += ["", "active"]
+    row += ["", "active", str(int(inserted.timestamp()))]
+    return row
 
-    ws.append_row(row, value_input_option="RAW")
+def append_post_rows(ws: gspread.Worksheet, rows: List[List[str]], state: LocalState) -> None:
+    # Single values.append call for all rows, then mirror them into the state DB
+    if not rows:
+        return
+    # values.append grows the grid itself in one step; no separate resize needed
+    resp = ws.append_rows(rows, value_input_option="RAW")
+    first_row = appended_row_index(resp)
+    inserted_i = HEADER.index("inserted_utc")
+    state.add_posts([
+        (row[0], row[inserted_i], "active", first_row + i if first_row else None)
+        for i, row in enumerate(rows)
+    ])
 
 
-def find_row_index_by_post_id(ws: gspread.Worksheet, post_id: str) -> Optional[int]:
-    # Returns 1-based row index in sheet, or None
-    try:
-        cell = ws.find(post_id)
-        # Ensure it's in column A (post_id)
-        if cell.col == 1:
-            return cell.row
-        return None
-    except Exception:
-        return None
-
 def read_row(ws: gspread.Worksheet, row_idx: int) -> List[str]:
     # Return full row (as list of strings)
-    return ws.row_values(row_idx)
+    return [safe_str(v) for v in ws.row_values(row_idx, **SHEET_READ_OPTIONS)]
+
+def col_letter(col: int) -> str:
+    # 1 -> "A", 27 -> "AA"
+    return gspread.utils.rowcol_to_a1(1, col).rstrip("0123456789")
 
-def update_cells(ws: gspread.Worksheet, row_idx: int, updates: Dict[int, str]) -> None:
+def read_columns(ws: gspread.Worksheet, cols: set, width: int) -> List[List[str]]:
+    """
+    Fetch only the given 1-based columns for rows 2..end with one batch_get.
+    Returns full-width rows (unfetched cells are "") so callers can index by column as usual.
+    """
+    # Merge adjacent columns into runs, e.g. {1, 7, 8, 13..26} -> A, G:H, M:Z
+    runs: List[Tuple[int, int]] = []
+    for c in sorted(cols):
+        if runs and runs[-1][1] == c - 1:
+            runs[-1] = (runs[-1][0], c)
+        else:
+            runs.append((c, c))
+
+    ranges = [f"{col_letter(a)}2:{col_letter(b)}" for a, b in runs]
+    results = ws.batch_get(ranges, **SHEET_READ_OPTIONS)
+
+    n_rows = max((len(r) for r in results), default=0)
+    rows = [[""] * width for _ in range(n_rows)]
+    for (first_col, _), values in zip(runs, results):
+        for i, vals in enumerate(values):
+            rows[i][first_col - 1:first_col - 1 + len(vals)] = [safe_str(v) for v in vals]
+    return rows
+
+def queue_cell_updates(
+    pending: List[Dict[str, Any]],
+    ws: gspread.Worksheet,
+    row_idx: int,
+    updates: Dict[int, str],
+) -> None:
     """
     updates: {col_index_1_based: value}
+    Appends A1-range entries to `pending` for a later flush_updates().
     """
-    if not updates:
-        return
-    cells = []
     for col, val in updates.items():
-        cells.append(gspread.Cell(row=row_idx, col=col, value=val))
-    ws.update_cells(cells, value_input_option="RAW")
+        a1 = gspread.utils.rowcol_to_a1(row_idx, col)
+        # absolute_range_name quotes the title (and escapes any apostrophes in it)
+        pending.append({"range": gspread.utils.absolute_range_name(ws.title, a1), "values": [[val]]})
+
+def flush_updates(ws: gspread.Worksheet, pending: List[Dict[str, Any]]) -> None:
+    # One values.batchUpdate call for everything queued
+    if not pending:
+        return
+    ws.spreadsheet.values_batch_update(body={"valueInputOption": "RAW", "data": pending})
 
 
 # ---------------------------
@@ -267,21 +530,28 @@ def cmd_poll() -> None:
     reddit = make_reddit()
     gc = make_gspread_client()
     ws = open_worksheet(gc)
-    ensure_header(ws)
+    state = LocalState()
+    ensure_header(ws, state)
 
-    existing = get_existing_post_ids(ws)
+    existing = get_existing_post_ids(ws, state)
 
-    sr = reddit.subreddit(SUBREDDIT)
-    new_posts = list(sr.new(limit=POST_FETCH_LIMIT))
+    sr = get_subreddit(reddit, config().subreddit)
 
-    added = 0
-    for sub in new_posts:
+    # sr.new() is newest-first, so a run of already-logged posts usually means we've caught up
+    new_rows = []
+    known_streak = 0
+    for sub in sr.new(limit=POST_FETCH_LIMIT):
         if sub.id in existing:
+            known_streak += 1
+            if POLL_STOP_AFTER_KNOWN and known_streak >= POLL_STOP_AFTER_KNOWN:
+                break
             continue
-        append_post_row(ws, sub)
-        added += 1
+        known_streak = 0
+        new_rows.append(build_post_row(sub))
+    append_post_rows(ws, new_rows, state)
 
-    print(f"[poll] Added {added} new post(s).")
+    state.close()
+    print(f"[poll] Added {len(new_rows)} new post(s).")
 
 def cmd_daily() -> None:
     """
@@ -291,26 +561,44 @@ def cmd_daily() -> None:
     reddit = make_reddit()
     gc = make_gspread_client()
     ws = open_worksheet(gc)
-    ensure_header(ws)
 
-    all_values = ws.get_all_values()
-    if len(all_values) <= 1:
+    header = read_row(ws, 1)
+    if not header:
+        state = LocalState()
+        write_header(ws, state)
+        state.close()
         print("[daily] No rows yet.")
         return
 
-    header = all_values[0]
-    rows = all_values[1:]  # excludes header
-    today = date.today()  # local machine date; script stores UTC timestamps though
-
     # Map header names to columns (1-based)
     col_index = {name: i + 1 for i, name in enumerate(header)}
 
     inserted_col = col_index["inserted_utc"]
+    epoch_col = col_index.get("inserted_epoch")  # absent on sheets created before it was added
     status_col = col_index["status"]
     last_checked_col = col_index["last_checked_utc"]
+    # Sheets created by this script match HEADER; older/hand-edited ones are resolved once here
+    slot_cols = DAY_SLOT_COLS if header == HEADER else day_slot_cols(header)
+
+    # Only download the columns the loop below reads (skips title/body/etc.)
+    wanted = {col_index["post_id"], inserted_col, status_col}
+    if epoch_col:
+        wanted.add(epoch_col)
+    for cols in slot_cols:
+        if cols:
+            wanted.update(cols)
+    rows = read_columns(ws, wanted, len(header))  # excludes header
+    if not rows:
+        print("[daily] No rows yet.")
+        return
+
+    today = date.today()  # local machine date; script stores UTC timestamps though
+    now_iso = to_iso_z(utc_now())  # one last_checked_utc value for the whole run
 
     updated_count = 0
     done_count = 0
+    pending: List[Dict[str, Any]] = []
+    targets: List[Tuple[int, str, int, int]] = []  # (row_idx, post_id, score_col, comm_col)
 
     for offset, row in enumerate(rows):
         row_idx = offset + 2  # because header is row 1
@@ -319,14 +607,19 @@ def cmd_daily() -> None:
             continue
 
         post_id = row[col_index["post_id"] - 1]
-        inserted_str = row[inserted_col - 1] if len(row) >= inserted_col else ""
-        if not inserted_str:
-            continue
+        epoch_str = row[epoch_col - 1] if epoch_col and len(row) >= epoch_col else ""
+        if epoch_str:
+            # UTC calendar day of insertion, without building a datetime
+            inserted_ordinal = UNIX_EPOCH_ORDINAL + int(epoch_str) // 86400
+        else:
+            inserted_str = row[inserted_col - 1] if len(row) >= inserted_col else ""
+            if not inserted_str:
+                continue
+            inserted_ordinal = parse_iso_z(inserted_str).date().toordinal()
 
-        inserted_dt = parse_iso_z(inserted_str)
         # Determine which day slot to fill:
         # Day 1 is the first daily run after insertion date; we use calendar day difference.
-        days_since = (today - inserted_dt.date()).days
+        days_since = today.toordinal() - inserted_ordinal
         day_index = days_since  # 0 means same calendar date as insertion
         # We only record day1..dayN, so require at least 1 day since insertion date
         slot = day_index
@@ -335,21 +628,18 @@ def cmd_daily() -> None:
             continue
         if slot > TRACK_DAYS:
             # past tracking window; mark done if not already
-            update_cells(ws, row_idx, {
+            queue_cell_updates(pending, ws, row_idx, {
                 status_col: "done",
-                last_checked_col: to_iso_z(utc_now()),
+                last_checked_col: now_iso,
             })
             done_count += 1
             continue
 
         # Determine target columns
-        score_col_name = f"day{slot}_score"
-        comm_col_name = f"day{slot}_comments"
-        if score_col_name not in col_index or comm_col_name not in col_index:
+        cols = slot_cols[slot - 1]
+        if cols is None:
             continue
-
-        score_col = col_index[score_col_name]
-        comm_col = col_index[comm_col_name]
+        score_col, comm_col = cols
 
         # If already filled, don't overwrite
         existing_score = row[score_col - 1] if len(row) >= score_col else ""
@@ -357,34 +647,46 @@ def cmd_daily() -> None:
         if (existing_score or "").strip() and (existing_comm or "").strip():
             continue
 
-        try:
-            subm = reddit.submission(id=post_id)
-            score = str(subm.score)
-            comms = str(subm.num_comments)
-
-            # If removed/deleted, PRAW often still returns numbers; you can optionally detect:
-            # removed_by_category can exist, but is not always present.
-            updates = {
-                score_col: score,
-                comm_col: comms,
-                last_checked_col: to_iso_z(utc_now()),
-                status_col: "active",
-            }
-            update_cells(ws, row_idx, updates)
-            updated_count += 1
+        targets.append((row_idx, post_id, score_col, comm_col))
 
-        except Exception as e:
-            update_cells(ws, row_idx, {
-                last_checked_col: to_iso_z(utc_now()),
-                status_col: f"error: {type(e).__name__}",
+    # Fetch all targeted posts in batches, then queue their updates
+    stats = fetch_submission_stats(reddit, [t[1] for t in targets])
+    log_rate_limits(reddit, "after fetch")
+
+    for row_idx, post_id, score_col, comm_col in targets:
+        result = stats.get(post_id)
+        if result is None:
+            # Deferred by the rate-limit guard; row stays as-is and is retried next run
+            continue
+        if isinstance(result, Exception):
+            queue_cell_updates(pending, ws, row_idx, {
+                last_checked_col: now_iso,
+                status_col: f"error: {type(result).__name__}",
             })
+            continue
+
+        score, comms = result
+        # If removed/deleted, PRAW often still returns numbers; you can optionally detect:
+        # removed_by_category can exist, but is not always present.
+        updates = {
+            score_col: score,
+            comm_col: comms,
+            last_checked_col: now_iso,
+            status_col: "active",
+        }
+        queue_cell_updates(pending, ws, row_idx, updates)
+        updated_count += 1
+
+    flush_updates(ws, pending)
 
     print(f"[daily] Updated {updated_count} post(s); marked done {done_count} post(s).")
 
 def cmd_init_sheet() -> None:
     gc = make_gspread_client()
     ws = open_worksheet(gc)
-    ensure_header(ws)
+    state = LocalState()
+    ensure_header(ws, state)
+    state.close()
     print("[init-sheet] Header ensured.")
 
 